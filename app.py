@@ -1,19 +1,25 @@
 
 from pathlib import Path
 from datetime import datetime, timedelta
+import io
+import threading
 
 import numpy as np
 import pandas as pd
 import requests
-import matplotlib.pyplot as plt
+from matplotlib import animation
 import streamlit as st
 
 from goes_plots import (
     plot_goes_band_chile,
+    build_base_figure,
+    update_figure,
+    animacion_goes_mp4,
     descargar_goes_aws,
     descargar_glm_aws,
     descargar_goes_serie_aws,
     descargar_goes_ultima_hora_aws,
+    descargar_frame_goes_aws,
 )
 
 
@@ -60,40 +66,129 @@ st.sidebar.checkbox("Estaciones superficie", value=True, disabled=True)
 st.sidebar.markdown("---")
 
 # ---------------------------
-# DATOS DEMO DE ESTACIONES
+# FIGURAS GOES EN CACHÉ
 # ---------------------------
 
-np.random.seed(42)
-fechas_demo = pd.date_range(
-    datetime.combine(fecha_inicio, datetime.min.time()),
-    datetime.combine(fecha_fin, datetime.min.time()),
-    freq="6H",
-)
+# Cada rerun (slider, play, GLM) volvería a leer el NetCDF y a dibujar todo.
+# Guardamos el PNG ya renderizado (bytes): cache_data entrega una copia a
+# cada sesión (una figura compartida entre sesiones no es thread-safe).
+# Las figuras de goes_plots no pasan por pyplot, así que no hay que cerrarlas.
+@st.cache_data(max_entries=64, show_spinner=False)
+def png_goes_cacheado(nc_path, domain, region_name, glm_path):
+    fig = plot_goes_band_chile(
+        nc_path,
+        domain=list(domain),
+        region_name=region_name,
+        glm_path=glm_path,
+    )
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=100, bbox_inches="tight")
+    return buf.getvalue()
+
+
+# Frames de la animación como PNG (bytes): se dibujan sobre la figura base
+# de la sesión y mover el slider hacia atrás es solo una búsqueda en caché.
+@st.cache_data(max_entries=128, show_spinner=False)
+def png_frame_goes(nc_path, domain, region_name, banda, glm_path):
+    # La figura base (costas, gridlines, colorbar, minimapa) se construye
+    # una sola vez por dominio/banda; en cada frame solo se actualizan
+    # los datos de la imagen, el GLM y el título.
+    clave_fig = (domain, region_name, banda)
+
+    if st.session_state.get("anim_fig_key") != clave_fig:
+        # La figura anterior (otro dominio/banda) se reemplaza; al no estar
+        # registrada en pyplot, se libera al soltar la referencia
+        st.session_state.anim_fig = build_base_figure(
+            nc_path,
+            domain=list(domain),
+            region_name=region_name,
+        )
+        st.session_state.anim_fig_key = clave_fig
+
+    fig, ax, im = st.session_state.anim_fig
+    update_figure(
+        fig,
+        ax,
+        im,
+        nc_path,
+        domain=list(domain),
+        region_name=region_name,
+        glm_path=glm_path,
+    )
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=100, bbox_inches="tight")
+    return buf.getvalue()
+
+
+# El MP4 son bytes (serializables), así que aquí sí sirve cache_data
+@st.cache_data(max_entries=16, show_spinner=False)
+def animacion_mp4_cacheada(frames, domain, region_name, fps, glm_paths):
+    return animacion_goes_mp4(
+        list(frames),
+        domain=list(domain),
+        region_name=region_name,
+        fps=fps,
+        glm_paths=list(glm_paths),
+    )
+
+
+# ---------------------------
+# DATOS DEMO DE ESTACIONES
+# ---------------------------
 
 estaciones = ["Estación A", "Estación B", "Estación C"]
-data_est = []
-
-for est in estaciones:
-    for f in fechas_demo:
-        data_est.append(
-            {
-                "fecha": f,
-                "estacion": est,
-                "temp": 10 + 10 * np.random.rand(),
-                "pp": max(0, np.random.randn() * 2),
-                "viento": 5 + 5 * np.random.rand(),
-            }
-        )
 
-df_est = pd.DataFrame(data_est)
 
-coords_est = pd.DataFrame(
-    {
-        "lat": [-30.1, -30.3, -30.5],
-        "lon": [-70.7, -70.9, -71.1],
-        "estacion": estaciones,
+@st.cache_data(show_spinner=False)
+def construir_demo(fi, ff):
+    """
+    Datos demo de estaciones entre fi y ff (cada 6 h).
+    Devuelve (df_est, coords_est, por_estacion); es función pura de las
+    fechas, así que se cachea entre reruns. `por_estacion` es un dict
+    {estacion: DataFrame indexado por fecha} para no filtrar df_est
+    en cada rerun.
+    """
+    fechas_demo = pd.date_range(
+        datetime.combine(fi, datetime.min.time()),
+        datetime.combine(ff, datetime.min.time()),
+        freq="6h",
+    )
+
+    # Construcción vectorizada: una columna por variable, sin loop fila a fila
+    rng = np.random.default_rng(42)
+    n_f = len(fechas_demo)
+    n_total = len(estaciones) * n_f
+
+    df_est = pd.DataFrame(
+        {
+            "fecha": np.tile(fechas_demo.values, len(estaciones)),
+            "estacion": np.repeat(estaciones, n_f),
+            "temp": 10 + 10 * rng.random(n_total),
+            "pp": np.maximum(0, rng.standard_normal(n_total) * 2),
+            "viento": 5 + 5 * rng.random(n_total),
+        }
+    )
+    df_est["estacion"] = df_est["estacion"].astype("category")
+
+    # Ya indexados por fecha: los gráficos no repiten set_index en cada rerun
+    por_estacion = {
+        nombre: g.set_index("fecha")
+        for nombre, g in df_est.groupby("estacion", observed=True)
     }
-)
+
+    coords_est = pd.DataFrame(
+        {
+            "lat": [-30.1, -30.3, -30.5],
+            "lon": [-70.7, -70.9, -71.1],
+            "estacion": estaciones,
+        }
+    )
+
+    return df_est, coords_est, por_estacion
+
+
+df_est, coords_est, por_estacion = construir_demo(fecha_inicio, fecha_fin)
 
 # ---------------------------
 # TABS
@@ -173,11 +268,11 @@ with tab_sat:
             )
 
         with st.spinner("Generando figura GOES..."):
-            fig = plot_goes_band_chile(
+            png = png_goes_cacheado(
                 nc_path,
-                domain=domain,
-                region_name=region,
-                glm_path=glm_path,
+                tuple(domain),
+                region,
+                glm_path,
             )
 
         st.markdown(
@@ -185,7 +280,7 @@ with tab_sat:
             f"**Hora UTC:** {hora:02d} — **Banda:** C{banda:02d}"
         )
 
-        st.pyplot(fig)
+        st.image(png, width="stretch")
 
         
 
@@ -193,13 +288,15 @@ with tab_sat:
     # MODO 2: ANIMACIÓN (última hora)
     # ============================
     else:
-        # Descargamos TODOS los frames disponibles en la última hora
+        # Listamos TODOS los frames disponibles en la última hora; solo se
+        # descarga el frame que se va a mostrar (el resto se precarga abajo)
         frames = descargar_goes_ultima_hora_aws(
             fecha.year,
             doy,
             hora_central=hora,
             band=banda,
             carpeta="data/GOES19",
+            descargar=False,
         )
 
         if not frames:
@@ -211,116 +308,223 @@ with tab_sat:
 
         n_frames = len(frames)
 
-        # Estados en session_state
-        if "frame_index" not in st.session_state:
-            st.session_state.frame_index = n_frames - 1  # último frame por defecto
+        # ============================================
+        # VIDEO MP4 PRE-RENDERIZADO (OPCIONAL)
+        # ============================================
+        ffmpeg_ok = animation.writers.is_available("ffmpeg")
+        ver_video = n_frames > 1 and st.checkbox(
+            "Ver como video MP4 (pre-renderizado)",
+            value=False,
+            disabled=not ffmpeg_ok,
+            help=None if ffmpeg_ok else "Requiere ffmpeg instalado en el servidor.",
+        )
 
-        if "playing" not in st.session_state:
-            st.session_state.playing = False
+        if ver_video:
+            with st.spinner("Descargando frames GOES de la última hora..."):
+                frames_video = descargar_goes_ultima_hora_aws(
+                    fecha.year,
+                    doy,
+                    hora_central=hora,
+                    band=banda,
+                    carpeta="data/GOES19",
+                )
 
-        if "anim_speed" not in st.session_state:
-            st.session_state.anim_speed = 0.5  # segundos entre frames
+            if not frames_video:
+                st.error("No se pudieron descargar los frames GOES para el video.")
+                st.stop()
+
+            # GLM: un archivo por hora, compartido por los frames de esa hora
+            glm_por_hora = {}
+            if mostrar_glm:
+                for h in sorted({dt.hour for dt, _ in frames_video}):
+                    glm_por_hora[h] = descargar_glm_aws(
+                        fecha.year, doy, h, carpeta="data/GLM"
+                    )
+
+            fps = max(1, round(1 / st.session_state.get("anim_speed", 0.5)))
+
+            with st.spinner("Generando video de la animación..."):
+                video = animacion_mp4_cacheada(
+                    tuple(frames_video),
+                    tuple(domain),
+                    region,
+                    fps,
+                    tuple(glm_por_hora.get(dt.hour) for dt, _ in frames_video),
+                )
 
-        # Caso especial: solo un frame → no tiene sentido animar
-        if n_frames == 1:
-            dt_sel, nc_sel = frames[0]
-            etiqueta_sel = dt_sel.strftime("%H:%M")
-            st.info(
-                f"Solo se encontró una imagen disponible: {etiqueta_sel} UTC"
+            st.video(video, format="video/mp4", loop=True)
+            st.markdown(
+                f"Video con datos entre las "
+                f"**{frames_video[0][0]:%H:%M}** y **{frames_video[-1][0]:%H:%M}** (UTC) "
+                f"— Banda C{banda:02d}"
             )
-            labels = None
 
         else:
-            # Etiquetas con hora y minuto
-            labels = [dt.strftime("%H:%M") for dt, _ in frames]
-
-            col_play, col_speed = st.columns([1, 3])
-
-            with col_play:
-                if st.button("▶ / ⏸ Play / Pausa"):
-                    st.session_state.playing = not st.session_state.playing
-
-            with col_speed:
-                st.session_state.anim_speed = st.slider(
-                    "Velocidad (segundos entre frames)",
-                    min_value=0.1,
-                    max_value=2.0,
-                    value=st.session_state.anim_speed,
-                    step=0.1,
-                )
-
-            # Slider manual (sin key, usamos frame_index solo en session_state)
-            idx = st.slider(
-                "Frame de la animación (hora UTC)",
-                min_value=0,
-                max_value=n_frames - 1,
-                value=st.session_state.frame_index,
-                format="%d",
-            )
+            # Estados en session_state
+            if "frame_index" not in st.session_state:
+                st.session_state.frame_index = n_frames - 1  # último frame por defecto
 
-            # Si el usuario movió el slider, actualizamos frame_index y pausamos
-            if idx != st.session_state.frame_index:
-                st.session_state.frame_index = idx
+            if "playing" not in st.session_state:
                 st.session_state.playing = False
 
-            # Frame seleccionado final
-            dt_sel, nc_sel = frames[st.session_state.frame_index]
-            etiqueta_sel = dt_sel.strftime("%H:%M")
+            if "anim_speed" not in st.session_state:
+                st.session_state.anim_speed = 0.5  # segundos entre frames
 
-        # ============================================
-        # DESCARGA GLM (OPCIONAL)
-        # ============================================
-        glm_path = None
-        if mostrar_glm:
-            # Usamos la HORA del frame seleccionado para GLM
-            h_glm = dt_sel.hour
-            glm_path = descargar_glm_aws(
-                fecha.year,
-                doy,
-                h_glm,
-                carpeta="data/GLM",
-            )
+            # Caso especial: solo un frame → no tiene sentido animar
+            if n_frames == 1:
+                dt_sel, nc_sel = frames[0]
+                etiqueta_sel = dt_sel.strftime("%H:%M")
+                st.info(
+                    f"Solo se encontró una imagen disponible: {etiqueta_sel} UTC"
+                )
+                labels = None
+
+            else:
+                # Etiquetas con hora y minuto
+                labels = [dt.strftime("%H:%M") for dt, _ in frames]
+
+                col_play, col_speed = st.columns([1, 3])
+
+                with col_play:
+                    if st.button("▶ / ⏸ Play / Pausa"):
+                        st.session_state.playing = not st.session_state.playing
+
+                with col_speed:
+                    st.session_state.anim_speed = st.slider(
+                        "Velocidad (segundos entre frames)",
+                        min_value=0.1,
+                        max_value=2.0,
+                        value=st.session_state.anim_speed,
+                        step=0.1,
+                    )
+
+                # Slider manual (sin key, usamos frame_index solo en session_state)
+                idx = st.slider(
+                    "Frame de la animación (hora UTC)",
+                    min_value=0,
+                    max_value=n_frames - 1,
+                    value=st.session_state.frame_index,
+                    format="%d",
+                )
 
-        # ============================================
-        # PLOT
-        # ============================================
-        with st.spinner(
-            f"Generando figura GOES para las {etiqueta_sel} UTC..."
-        ):
-            fig = plot_goes_band_chile(
-                nc_sel,
-                domain=domain,
-                region_name=region,
-                glm_path=glm_path,
-            )
+                # Si el usuario movió el slider, actualizamos frame_index y pausamos
+                if idx != st.session_state.frame_index:
+                    st.session_state.frame_index = idx
+                    st.session_state.playing = False
+
+                # Frame seleccionado final
+                dt_sel, nc_sel = frames[st.session_state.frame_index]
+                etiqueta_sel = dt_sel.strftime("%H:%M")
+
+            # ============================================
+            # DESCARGA DEL FRAME ACTUAL + PRECARGA DE LOS SIGUIENTES
+            # ============================================
+            if "prefetch_en_curso" not in st.session_state:
+                st.session_state.prefetch_en_curso = set()
+
+            if "prefetch_thread" not in st.session_state:
+                st.session_state.prefetch_thread = None
+
+            hilo = st.session_state.prefetch_thread
+
+            # Si el frame actual ya se está bajando en segundo plano, lo esperamos
+            # un rato; si S3 va lento (reintentos) seguimos con la descarga
+            # directa abajo (_get_s3 usa .part por hilo, así que es seguro)
+            if nc_sel in st.session_state.prefetch_en_curso and hilo is not None:
+                hilo.join(timeout=15)
+
+            with st.spinner(f"Descargando imagen GOES de las {etiqueta_sel} UTC..."):
+                nc_sel = descargar_frame_goes_aws(nc_sel)
+
+            if nc_sel is None:
+                st.error("No se pudo descargar el archivo GOES del frame seleccionado.")
+                st.stop()
+
+            idx_actual = st.session_state.frame_index if n_frames > 1 else 0
+            siguientes = [
+                frames[(idx_actual + k) % n_frames][1]
+                for k in (1, 2)
+            ]
+            siguientes = [
+                ruta for ruta in dict.fromkeys(siguientes)
+                if not Path(ruta).exists()
+                and ruta not in st.session_state.prefetch_en_curso
+            ]
+
+            # Solo con la animación en reproducción: en pausa (cambiar GLM,
+            # velocidad...) el usuario quizás nunca vea esos frames
+            if (
+                st.session_state.playing
+                and siguientes
+                and (hilo is None or not hilo.is_alive())
+            ):
+                en_curso = st.session_state.prefetch_en_curso
+                en_curso.update(siguientes)
+
+                def _precargar(rutas, en_curso=en_curso):
+                    for ruta in rutas:
+                        descargar_frame_goes_aws(ruta)
+                        en_curso.discard(ruta)
+
+                hilo = threading.Thread(target=_precargar, args=(siguientes,), daemon=True)
+                hilo.start()
+                st.session_state.prefetch_thread = hilo
+
+            # ============================================
+            # DESCARGA GLM (OPCIONAL)
+            # ============================================
+            glm_path = None
+            if mostrar_glm:
+                # Usamos la HORA del frame seleccionado para GLM
+                h_glm = dt_sel.hour
+                glm_path = descargar_glm_aws(
+                    fecha.year,
+                    doy,
+                    h_glm,
+                    carpeta="data/GLM",
+                )
 
-        st.pyplot(fig)
+            # ============================================
+            # PLOT
+            # ============================================
+            with st.spinner(
+                f"Generando figura GOES para las {etiqueta_sel} UTC..."
+            ):
+                png = png_frame_goes(
+                    nc_sel,
+                    tuple(domain),
+                    region,
+                    banda,
+                    glm_path,
+                )
 
-        # Texto informativo
-        if n_frames == 1:
-            st.markdown(
-                f"Mostrando imagen única para las **{etiqueta_sel} UTC** "
-                f"— Banda C{banda:02d}"
-            )
-        else:
-            st.markdown(
-                f"Mostrando animación con datos entre las "
-                f"**{labels[0]}** y **{labels[-1]}** (UTC).  \n"
-                f"Frame actual: **{etiqueta_sel} UTC** — Banda C{banda:02d}"
-            )
+            st.image(png, width="stretch")
 
-        # ============================================
-        # AVANZAR AUTOMÁTICAMENTE SI ESTÁ EN PLAY
-        # ============================================
-        if n_frames > 1 and st.session_state.playing:
-            import time
+            # Texto informativo
+            if n_frames == 1:
+                st.markdown(
+                    f"Mostrando imagen única para las **{etiqueta_sel} UTC** "
+                    f"— Banda C{banda:02d}"
+                )
+            else:
+                st.markdown(
+                    f"Mostrando animación con datos entre las "
+                    f"**{labels[0]}** y **{labels[-1]}** (UTC).  \n"
+                    f"Frame actual: **{etiqueta_sel} UTC** — Banda C{banda:02d}"
+                )
+
+            # ============================================
+            # AVANZAR AUTOMÁTICAMENTE SI ESTÁ EN PLAY
+            # ============================================
+            if n_frames > 1 and st.session_state.playing:
+                import time
 
-            time.sleep(st.session_state.anim_speed)
+                time.sleep(st.session_state.anim_speed)
 
-            frame_idx = st.session_state.frame_index
-            st.session_state.frame_index = (frame_idx + 1) % n_frames
+                frame_idx = st.session_state.frame_index
+                st.session_state.frame_index = (frame_idx + 1) % n_frames
 
-            st.rerun()
+                st.rerun()
     
 
 
@@ -333,23 +537,24 @@ with tab_est:
 
     est_sel = st.selectbox("Estación", estaciones)
 
-    df_filtrada = df_est[df_est["estacion"] == est_sel]
+    # (rango de fechas vacío → DataFrame vacío, igual que el filtro original)
+    df_idx = por_estacion.get(est_sel, df_est.iloc[0:0].set_index("fecha"))
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.markdown("**Temperatura (°C)**")
-        st.line_chart(df_filtrada.set_index("fecha")["temp"])
+        st.line_chart(df_idx["temp"])
 
         st.markdown("**Viento (m/s)**")
-        st.line_chart(df_filtrada.set_index("fecha")["viento"])
+        st.line_chart(df_idx["viento"])
 
     with col2:
         st.markdown("**Precipitación (mm)**")
-        st.bar_chart(df_filtrada.set_index("fecha")["pp"])
+        st.bar_chart(df_idx["pp"])
 
         st.markdown("**Datos crudos (demo)**")
-        st.dataframe(df_filtrada, use_container_width=True)
+        st.dataframe(df_idx, width="stretch")
 
     st.markdown(
         "> Más adelante puedes reemplazar este dataset por tus datos reales (CR2, DGA, estaciones propias, etc.)."
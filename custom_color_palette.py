@@ -23,7 +23,6 @@ La función crea:
 
 import numpy as np
 import matplotlib.colors as mcolors
-from builtins import range as _py_range   # <- range ORIGINAL de Python
 
 
 def range(start: float, stop: float, step: float):
@@ -32,9 +31,9 @@ def range(start: float, stop: float, step: float):
     Devuelve un np.ndarray con puntos desde start hasta stop (incluido),
     con paso `step`.
     """
-    # añadimos un pequeño epsilon para incluir el extremo superior
+    # +1 para incluir el extremo superior
     n_steps = int(np.floor((stop - start) / step)) + 1
-    return np.linspace(start, start + step * (n_steps - 1), n_steps)
+    return start + step * np.arange(n_steps, dtype=np.float64)
 
 
 def _colors_from_spec(color_spec, n):
@@ -45,7 +44,8 @@ def _colors_from_spec(color_spec, n):
     """
     if isinstance(color_spec, mcolors.Colormap):
         xs = np.linspace(0.0, 1.0, n)
-        return [color_spec(x) for x in xs]
+        # el Colormap evaluado sobre un array devuelve (n, 4) de una vez
+        return [tuple(c) for c in color_spec(xs)]
 
     # asumimos lista de nombres / tuplas
     names = list(color_spec)
@@ -53,19 +53,14 @@ def _colors_from_spec(color_spec, n):
         # un solo color -> repetimos
         return [mcolors.to_rgba(names[0])] * n
 
-    # interpolamos entre los colores dados usando range ORIGINAL de Python
-    res = []
-    for i in _py_range(n):
-        t = i / max(n - 1, 1)
-        pos = t * (len(names) - 1)
-        i0 = int(np.floor(pos))
-        i1 = min(int(np.ceil(pos)), len(names) - 1)
-        frac = pos - i0
-        c0 = np.array(mcolors.to_rgba(names[i0]))
-        c1 = np.array(mcolors.to_rgba(names[i1]))
-        c = (1 - frac) * c0 + frac * c1
-        res.append(tuple(c))
-    return res
+    # interpolamos linealmente entre los colores dados (vectorizado)
+    base = np.array([mcolors.to_rgba(nm) for nm in names])   # (k, 4)
+    pos = np.linspace(0.0, len(names) - 1, n)
+    i0 = np.floor(pos).astype(int)
+    i1 = np.minimum(i0 + 1, len(names) - 1)
+    frac = (pos - i0)[:, None]
+    res = (1 - frac) * base[i0] + frac * base[i1]
+    return [tuple(c) for c in res]
 
 
 def creates_palette(paletas, extend="both"):
@@ -81,8 +76,8 @@ def creates_palette(paletas, extend="both"):
     Devuelve:
       cmap, ticks, norm, bounds
     """
-    all_vals = []
-    all_cols = []
+    vals_list = []
+    cols_list = []
 
     for pal in paletas:
         if len(pal) < 2:
@@ -91,17 +86,18 @@ def creates_palette(paletas, extend="both"):
         color_spec = pal[0]
         vals = np.asarray(pal[1], dtype=float)
 
-        # lista de colores para este segmento
+        # colores para este segmento, como array (len(vals), 4)
         cols_seg = _colors_from_spec(color_spec, len(vals))
-        all_vals.extend(vals.tolist())
-        all_cols.extend(cols_seg)
+        vals_list.append(vals)
+        cols_list.append(np.asarray(cols_seg, dtype=float).reshape(-1, 4))
 
-    all_vals = np.asarray(all_vals, dtype=float)
+    all_vals = np.concatenate(vals_list)
+    all_cols = np.concatenate(cols_list, axis=0)
 
-    # ordenamos por valor
-    order = np.argsort(all_vals)
+    # ordenamos por valor (estable: los empates conservan el orden de entrada)
+    order = np.argsort(all_vals, kind="stable")
     all_vals = all_vals[order]
-    all_cols = [all_cols[i] for i in order]
+    all_cols = all_cols[order]
 
     vmin = float(all_vals.min())
     vmax = float(all_vals.max())
@@ -117,7 +113,7 @@ def creates_palette(paletas, extend="both"):
     vals_norm[0] = 0.0
     vals_norm[-1] = 1.0
 
-    color_list = list(zip(vals_norm, all_cols))
+    color_list = list(zip(vals_norm.tolist(), map(tuple, all_cols)))
 
     cmap = mcolors.LinearSegmentedColormap.from_list("custom_ccp", color_list) 
 
@@ -130,4 +126,3 @@ def creates_palette(paletas, extend="both"):
 
     return cmap, ticks, norm, bounds
 
-
@@ -1,22 +1,26 @@
 from pathlib import Path
 import numpy as np
 import pandas as pd
+import matplotlib as mpl
 import matplotlib.pyplot as plt
-import cartopy.crs as ccrs
-import cartopy.feature as cfeature
-from cartopy.feature import NaturalEarthFeature
-from cartopy.mpl.ticker import LatitudeFormatter, LongitudeFormatter
-import cartopy.mpl.ticker as cticker
-import GOES
-import shutil
 import s3fs
 import matplotlib.colors as mcolors
 import custom_color_palette as ccp
 import os
-import xarray as xr
 import re
+import threading
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import matplotlib.ticker as mticker
+from matplotlib.animation import FFMpegWriter
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+# cartopy, GOES y xarray se importan dentro de las funciones que los usan:
+# son lentos de importar y Streamlit recarga este módulo en cada cambio.
 
 
 # --- Colormap para C08 (WV 6.2 μm) ---
@@ -48,13 +52,84 @@ cmap_c13 = mcolors.LinearSegmentedColormap.from_list("c13_goes", colors_c13)
 # Carpeta donde guardamos los archivos NetCDF descargados
 GOES_DIR = "data/GOES19"
 
+# Tamaño de la figura (pulgadas); el ancho define la resolución útil en pantalla
+FIGSIZE = (10, 12)
+
+# Posición del eje principal dentro de la figura (x, y, ancho, alto)
+EJE_PRINCIPAL = (0.12, 0.25, 0.78, 0.70)
+
+# Segundos que se reutiliza un listado de S3 antes de volver a pedirlo
+LISTADO_TTL_S = 300
+
 # Filesystem anónimo para leer desde el bucket noaa-goes19 en AWS
-fs = s3fs.S3FileSystem(anon=True)
+# (bloques de 8 MiB y sin fill_cache: los .nc se bajan completos con fs.get).
+# Un solo cliente compartido por todos los hilos, con pool de conexiones
+# suficiente para las descargas en paralelo y keep-alive para no repetir TLS.
+# El caché de listados de s3fs evita repetir LIST/HEAD (fs.ls por hora de ABI,
+# fs.glob de GLM) al cambiar de banda o activar GLM seguido, y deja vencer
+# las entradas a los LISTADO_TTL_S segundos.
+fs = s3fs.S3FileSystem(
+    anon=True,
+    default_block_size=8 * 2**20,
+    default_fill_cache=False,
+    use_listings_cache=True,
+    listings_expiry_time=LISTADO_TTL_S,
+    skip_instance_cache=False,
+    config_kwargs={
+        "max_pool_connections": 32,
+        "tcp_keepalive": True,
+        "retries": {"max_attempts": 3, "mode": "adaptive"},
+    },
+)
+
+# Inicio del barrido en los nombres GOES: ..._sYYYYDDDHHMM...
+_S_RE = re.compile(r"_s(\d{4})(\d{3})(\d{2})(\d{2})")
+
+# Número de descargas simultáneas desde S3 (el cliente de s3fs es thread-safe)
+MAX_WORKERS_S3 = 8
 
 # ---------------------------
 # FUNCIONES AUXILIARES
 # ---------------------------
 
+def _get_s3(key: str, ruta_local: Path) -> None:
+    """
+    Descarga `key` desde S3 a `ruta_local` con fs.get.
+
+    Se escribe primero a un archivo temporal y luego se renombra, así nunca
+    queda (ni se lee) un .nc a medio escribir. Propaga las excepciones.
+    """
+    ruta_local = Path(ruta_local)
+    ruta_tmp = ruta_local.with_name(ruta_local.name + f".{threading.get_ident()}.part")
+    try:
+        fs.get(key, str(ruta_tmp))
+        os.replace(ruta_tmp, ruta_local)
+    finally:
+        if ruta_tmp.exists():
+            ruta_tmp.unlink()
+
+
+def _listar_goes_hora(year: int, day_of_year: int, hour: int, band: int) -> list[str]:
+    """
+    Lista las llaves .nc de ABI-L2-CMIPF para una hora y banda.
+
+    Hace un solo `fs.ls` del directorio de la hora (todas las bandas); el
+    caché de listados de `fs` lo guarda LISTADO_TTL_S segundos, así cambiar
+    de banda o repetir la consulta no vuelve a llamar a S3. Propaga los
+    errores de S3.
+    """
+    directorio = f"noaa-goes19/ABI-L2-CMIPF/{year}/{day_of_year:03d}/{hour:02d}/"
+    try:
+        keys = fs.ls(directorio, detail=False)
+    except FileNotFoundError:
+        keys = []
+
+    patron = f"OR_ABI-L2-CMIPF-M6C{band:02d}_G19_"
+    return sorted(
+        k for k in keys
+        if Path(k).name.startswith(patron) and k.endswith(".nc")
+    )
+
 # ======================================================
 #   DESCARGA GOES
 # ======================================================
@@ -73,19 +148,10 @@ def descargar_goes_aws(year: int, day_of_year: int, hour: int, band: int, carpet
 
     Path(carpeta).mkdir(parents=True, exist_ok=True)
 
-    band_str = f"{band:02d}"
-
-    # Prefijo de las llaves en el bucket S3:
-    # noaa-goes19/ABI-L2-CMIPF/YYYY/DDD/HH/OR_ABI-L2-CMIPF-M6Cxx_G19_...
-    prefix = (
-        f"noaa-goes19/ABI-L2-CMIPF/"
-        f"{year}/{day_of_year:03d}/{hour:02d}/"
-        f"OR_ABI-L2-CMIPF-M6C{band_str}_G19_"
-    )
-
     try:
-        # Listar todos los archivos .nc que comiencen con ese prefijo
-        keys = fs.glob(prefix + "*.nc")
+        # Listar los archivos .nc de esa hora/banda:
+        # noaa-goes19/ABI-L2-CMIPF/YYYY/DDD/HH/OR_ABI-L2-CMIPF-M6Cxx_G19_...
+        keys = _listar_goes_hora(year, day_of_year, hour, band)
     except Exception as e:
         print("Error listando S3:", e)
         return None
@@ -106,8 +172,7 @@ def descargar_goes_aws(year: int, day_of_year: int, hour: int, band: int, carpet
 
     # Descargar desde S3 a disco local
     try:
-        with fs.open(key, "rb") as src, open(ruta_local, "wb") as dst:
-            shutil.copyfileobj(src, dst)
+        _get_s3(key, ruta_local)
     except Exception as e:
         print("Error descargando archivo desde S3:", e)
         return None
@@ -154,8 +219,7 @@ def descargar_glm_aws(year: int, day_of_year: int, hour: int, carpeta: str = "da
 
     # Descargar
     try:
-        with fs.open(key, "rb") as src, open(ruta_local, "wb") as dst:
-            shutil.copyfileobj(src, dst)
+        _get_s3(key, ruta_local)
     except Exception as e:
         print("Error descargando GLM:", e)
         return None
@@ -168,6 +232,7 @@ def descargar_goes_ultima_hora_aws(
     hora_central: int,
     band: int,
     carpeta: str = GOES_DIR,
+    descargar: bool = True,
 ):
     """
     Devuelve todos los frames disponibles en la última hora
@@ -176,34 +241,31 @@ def descargar_goes_ultima_hora_aws(
     Retorna una lista de [(dt, ruta_local_nc), ...] ordenados por tiempo,
     donde dt es un datetime (UTC) reconstruido a partir del nombre del archivo.
 
+    Si descargar=False solo se listan los frames: las rutas locales pueden
+    no existir todavía y se bajan luego con `descargar_frame_goes_aws`.
+
     Ejemplo: si hora_central = 3 => intervalo [02:00, 03:00] UTC.
     """
 
     Path(carpeta).mkdir(parents=True, exist_ok=True)
 
-    band_str = f"{band:02d}"
-
     # Vamos a mirar la hora central y la anterior
-    horas_a_consultar = [hora_central - 1, hora_central]
-
-    keys_todas = []
-
-    for h in horas_a_consultar:
-        if h < 0 or h > 23:
-            # Para simplificar, ignoramos el cambio de día.
-            continue
-
-        prefix = (
-            f"noaa-goes19/ABI-L2-CMIPF/"
-            f"{year}/{day_of_year:03d}/{h:02d}/"
-            f"OR_ABI-L2-CMIPF-M6C{band_str}_G19_"
-        )
+    # (para simplificar, ignoramos el cambio de día)
+    horas_a_consultar = [
+        h for h in (hora_central - 1, hora_central)
+        if 0 <= h <= 23
+    ]
 
+    def _listar(h):
         try:
-            ks = fs.glob(prefix + "*.nc")
-            keys_todas.extend(ks)
+            return _listar_goes_hora(year, day_of_year, h, band)
         except Exception as e:
             print("Error listando S3 para animación 1h:", e)
+            return []
+
+    # Listamos ambas horas en paralelo (un hilo por hora)
+    with ThreadPoolExecutor(max_workers=max(1, len(horas_a_consultar))) as ex:
+        keys_todas = [k for ks in ex.map(_listar, horas_a_consultar) for k in ks]
 
     if not keys_todas:
         return []
@@ -215,7 +277,7 @@ def descargar_goes_ultima_hora_aws(
         base = Path(key).name
         # Ejemplo: OR_ABI-L2-CMIPF-M6C13_G19_s20253350000208_e...
         # Buscamos la parte sYYYYDDDHHMM
-        m = re.search(r"_s(\d{4})(\d{3})(\d{2})(\d{2})", base)
+        m = _S_RE.search(base)
         if not m:
             continue
 
@@ -224,11 +286,12 @@ def descargar_goes_ultima_hora_aws(
         hh = int(m.group(3))  # hora
         mm = int(m.group(4))  # minuto
 
-        try:
-            dt = datetime.strptime(f"{yy:04d} {jjj:03d} {hh:02d} {mm:02d}", "%Y %j %H %M")
-        except Exception:
+        if not (1 <= jjj <= 366 and hh <= 23 and mm <= 59):
             continue
 
+        # Aritmética directa (más rápido que strptime con "%Y %j %H %M")
+        dt = datetime(yy, 1, 1) + timedelta(days=jjj - 1, hours=hh, minutes=mm)
+
         frames_tmp.append((dt, key))
 
     if not frames_tmp:
@@ -252,125 +315,330 @@ def descargar_goes_ultima_hora_aws(
     # Ordenar por tiempo
     frames_filtrados.sort(key=lambda x: x[0])
 
-    # Descargar a disco y devolver [(dt, ruta_local_nc), ...]
-    frames = []
+    rutas = [Path(carpeta) / Path(key).name for _, key in frames_filtrados]
 
-    for dt, key in frames_filtrados:
-        nombre_local = Path(key).name
-        ruta_local = Path(carpeta) / nombre_local
+    if not descargar:
+        return [
+            (dt, str(ruta_local))
+            for (dt, _), ruta_local in zip(frames_filtrados, rutas)
+        ]
 
-        if not ruta_local.exists():
-            try:
-                with fs.open(key, "rb") as src, open(ruta_local, "wb") as dst:
-                    shutil.copyfileobj(src, dst)
-            except Exception as e:
-                print("Error descargando archivo para animación 1h:", e)
-                continue
+    # Descargar a disco y devolver [(dt, ruta_local_nc), ...]
+    def _descargar(key, ruta_local):
+        try:
+            _get_s3(key, ruta_local)
+        except Exception as e:
+            print("Error descargando archivo para animación 1h:", e)
+            return False
+        return True
+
+    # Solo mandamos a descargar los archivos que no están ya en disco
+    pendientes = [
+        (key, ruta_local)
+        for (_, key), ruta_local in zip(frames_filtrados, rutas)
+        if not ruta_local.exists()
+    ]
 
-        frames.append((dt, str(ruta_local)))
+    fallidos = set()
+    if pendientes:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS_S3) as ex:
+            resultados = ex.map(lambda args: _descargar(*args), pendientes)
+            for (_, ruta_local), ok in zip(pendientes, resultados):
+                if not ok:
+                    fallidos.add(ruta_local)
+
+    frames = [
+        (dt, str(ruta_local))
+        for (dt, _), ruta_local in zip(frames_filtrados, rutas)
+        if ruta_local not in fallidos
+    ]
 
     return frames
 
+def descargar_frame_goes_aws(ruta_local: str) -> str | None:
+    """
+    Descarga un frame listado por `descargar_goes_ultima_hora_aws`
+    (con descargar=False) si todavía no está en disco.
+
+    La llave S3 se reconstruye desde el nombre del archivo
+    (OR_ABI-L2-CMIPF-M6Cxx_G19_sYYYYDDDHH...).
+
+    Devuelve la ruta local o None si falla.
+    """
+    ruta_local = Path(ruta_local)
+    if ruta_local.exists():
+        return str(ruta_local)
+
+    m = _S_RE.search(ruta_local.name)
+    if not m:
+        return None
+
+    key = (
+        f"noaa-goes19/ABI-L2-CMIPF/"
+        f"{m.group(1)}/{m.group(2)}/{m.group(3)}/{ruta_local.name}"
+    )
+
+    try:
+        ruta_local.parent.mkdir(parents=True, exist_ok=True)
+        _get_s3(key, ruta_local)
+    except Exception as e:
+        print("Error descargando frame GOES:", e)
+        return None
+
+    return str(ruta_local)
+
 # ======================================================
 #   PLOT GOES
 # ======================================================
-def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None):
+
+# Dominios predefinidos (lon_min, lon_max, lat_min, lat_max)
+DOMINIOS_PREDEF = {
+    "Chile Continental": [-85.0, -60.0, -60.0, -15.0],
+    "Chile Central":     [-75.0, -67.0, -35.0, -30.0],
+    "Isla de Pascua":    [-120.0, -103.0, -35.0, -20.0],
+}
+
+
+@lru_cache(maxsize=1)
+def _plate_carree():
     """
-    Genera un gráfico del GOES-19 con:
-    - Imagen satelital (CMI)
-    - Zoom dinámico por dominios
-    - Mapa pequeño con rectángulo del dominio (Opción A)
+    Única instancia de ccrs.PlateCarree() para todas las figuras: cada
+    construcción arma un CRS de pyproj, que es caro. (cartopy se importa
+    recién aquí, ver imports.)
     """
-    import custom_color_palette as ccp
+    import cartopy.crs as ccrs
+    return ccrs.PlateCarree()
 
-    # ======================================================
-    #   CARGAR ARCHIVO GOES
-    # ======================================================
-    ds = GOES.open_dataset(nc_path)
-
-    # ======================================================
-    #   DOMINIOS PREDEFINIDOS (lon_min, lon_max, lat_min, lat_max)
-    # ======================================================
-    dominios_predef = {
-        "Chile Continental": [-85.0, -60.0, -60.0, -15.0],
-        "Chile Central":     [-75.0, -67.0, -35.0, -30.0],
-        "Isla de Pascua":    [-120.0, -103.0, -35.0, -20.0],
-    }
 
+def _resolver_dominio(domain, region_name):
     if domain is None:
-        domain = dominios_predef.get(region_name, dominios_predef["Chile Continental"])
+        domain = DOMINIOS_PREDEF.get(region_name, DOMINIOS_PREDEF["Chile Continental"])
+    return list(domain)
 
+
+# ------------------------------------------------------
+#   GRILLA LAT/LON REGULAR
+# ------------------------------------------------------
+# El recorte de ds.image está en la grilla fija del satélite (ángulos de
+# barrido x/y), no en lon/lat regular. Para dibujarlo con imshow lo
+# remuestreamos (vecino más cercano) a una grilla lon/lat uniforme sobre
+# el dominio. Los índices dependen solo de la geometría, así que se
+# calculan una vez por dominio y se reutilizan en todos los frames.
+
+# Proyección de GOES-19 (GOES-East), GOES-R PUG Vol. 3, sección 5.1.2.8
+_GOES_R_EQ = 6378137.0
+_GOES_R_POL = 6356752.31414
+_GOES_H = 35786023.0 + _GOES_R_EQ
+_GOES_LON0 = -75.0
+
+
+def _shape_pantalla(shape, downsample=True):
+    """
+    Tamaño de la grilla a dibujar: si downsample, se reduce con un paso
+    entero para no superar el ancho del eje principal en píxeles (a más
+    resolución los píxeles se funden igual al dibujar).
+    """
+    if not downsample:
+        return tuple(shape)
+    target_px = int(EJE_PRINCIPAL[2] * FIGSIZE[0] * plt.rcParams["figure.dpi"])
+    # división hacia arriba: con paso hacia abajo la grilla podía quedar
+    # casi al doble del objetivo
+    paso = max(1, -(-shape[1] // target_px))
+    return (max(1, shape[0] // paso), max(1, shape[1] // paso))
+
+
+def _geos_xy(lon, lat):
+    """
+    Lon/lat (grados) → ángulos de barrido x/y (radianes) de la grilla fija.
+    Los puntos no visibles desde el satélite quedan en NaN.
+    """
+    lam = np.radians(np.asarray(lon, dtype=float) - _GOES_LON0)
+    phi = np.radians(np.asarray(lat, dtype=float))
+
+    e2 = 1.0 - (_GOES_R_POL / _GOES_R_EQ) ** 2
+    phi_c = np.arctan((_GOES_R_POL / _GOES_R_EQ) ** 2 * np.tan(phi))
+    r_c = _GOES_R_POL / np.sqrt(1.0 - e2 * np.cos(phi_c) ** 2)
+
+    s_x = _GOES_H - r_c * np.cos(phi_c) * np.cos(lam)
+    s_y = -r_c * np.cos(phi_c) * np.sin(lam)
+    s_z = r_c * np.sin(phi_c)
+
+    x = np.arcsin(-s_y / np.sqrt(s_x**2 + s_y**2 + s_z**2))
+    y = np.arctan(s_z / s_x)
+
+    oculto = _GOES_H * (_GOES_H - s_x) < s_y**2 + (_GOES_R_EQ / _GOES_R_POL) ** 2 * s_z**2
+    x[oculto] = np.nan
+    y[oculto] = np.nan
+    return x, y
+
+
+# Cada entrada son dos grillas int32 + una máscara del tamaño de destino
+# (decenas de MB para dominios grandes): pocas entradas
+@lru_cache(maxsize=4)
+def _indices_grilla_latlon(domain, shape, shape_dst, x0, x1, y0, y1):
+    """
+    Índices (i, j) del recorte (shape) para cada celda de una grilla lon/lat
+    uniforme de tamaño shape_dst sobre `domain`, más la máscara de celdas
+    sin dato. x0/x1, y0/y1: ángulos de barrido de los bordes del recorte.
+    """
     lon_min, lon_max, lat_min, lat_max = domain
+    n_filas, n_cols = shape
+    n_filas_dst, n_cols_dst = shape_dst
 
-    # ======================================================
-    #   LEER IMAGEN (CMI) + COORDENADAS
-    #   (usamos lonlat="corner" para obtener Lon/Lat de vértices)
-    # ======================================================
-    # Si en algún momento necesitas detectar otra variable, aquí podrías
-    # hacer un loop por ["CMI", "CMIP", "Rad", "Sectorized_CMI"].
+    # centros de celda; la fila 0 es el norte (imshow con origin="upper")
+    lons = lon_min + (np.arange(n_cols_dst) + 0.5) * (lon_max - lon_min) / n_cols_dst
+    lats = lat_max - (np.arange(n_filas_dst) + 0.5) * (lat_max - lat_min) / n_filas_dst
+    LON, LAT = np.meshgrid(lons, lats)
 
-    CMI, LonCor, LatCor = ds.image("CMI", lonlat="corner", domain=domain)
+    X, Y = _geos_xy(LON, LAT)
+    with np.errstate(invalid="ignore"):
+        j = np.floor((X - x0) / (x1 - x0) * n_cols)
+        i = np.floor((Y - y0) / (y1 - y0) * n_filas)
+        valido = (j >= 0) & (j < n_cols) & (i >= 0) & (i < n_filas)
 
-    sat      = ds.attribute("platform_ID")
-    time_str = ds.attribute("time_coverage_start")
-    band_id  = int(ds.variable("band_id").data[0])
-    wl       = float(ds.variable("band_wavelength").data[0])
+    i = np.where(valido, i, 0).astype(np.int32)
+    j = np.where(valido, j, 0).astype(np.int32)
+    return i, j, ~valido
 
-    long_name = CMI.long_name
-    units     = CMI.units
 
-    # ======================================================
-    #   METADATOS PARA EL TÍTULO
-    # ======================================================
-    # Número de banda
-    try:
-        banda_num = int(ds.variable("band_id").data[0])
-    except Exception:
-        # Respaldo: intentar sacarlo del nombre del archivo
-        import re  # o mejor: tener re importado arriba del archivo
-        base = os.path.basename(nc_path)
-        m = re.search(r"C(\d{2})_", base)
-        banda_num = int(m.group(1)) if m else 0
+def _recortar_a_dominio(field, lon_c, lat_c, domain):
+    """
+    Recorta `field` (y sus vértices lon_c/lat_c, una fila/columna más) a las
+    filas y columnas que tocan `domain`, como vistas sin copiar. Por si
+    `ds.image` devolviera más que el dominio (ej. disco completo): así
+    ninguna cuenta posterior recorre la grilla entera.
+    """
+    lon_min, lon_max, lat_min, lat_max = domain
+    lon = np.ma.getdata(lon_c)
+    lat = np.ma.getdata(lat_c)
+    with np.errstate(invalid="ignore"):
+        dentro = (lon >= lon_min) & (lon <= lon_max) & (lat >= lat_min) & (lat <= lat_max)
+    dentro &= ~np.ma.getmaskarray(lon_c)
+
+    filas = np.flatnonzero(dentro.any(axis=1))
+    cols = np.flatnonzero(dentro.any(axis=0))
+    if filas.size == 0 or cols.size == 0:
+        return field, lon_c, lat_c
+
+    # celdas con algún vértice en el dominio (± una de margen)
+    n_filas, n_cols = field.shape
+    i0, i1 = max(filas[0] - 1, 0), min(filas[-1] + 1, n_filas)
+    j0, j1 = max(cols[0] - 1, 0), min(cols[-1] + 1, n_cols)
+    if (i0, i1, j0, j1) == (0, n_filas, 0, n_cols):
+        return field, lon_c, lat_c
+
+    return (
+        field[i0:i1, j0:j1],
+        lon_c[i0:i1 + 1, j0:j1 + 1],
+        lat_c[i0:i1 + 1, j0:j1 + 1],
+    )
 
-    # Longitud de onda (si está disponible)
-    try:
-        wave = float(ds.variable("band_wavelength").data[0])
-    except Exception:
-        wave = None
 
-    # Hora de inicio del barrido
-    try:
-        fecha_txt = ds.attribute("time_coverage_start")  # ej. "2025-12-01T00:00:20.8Z"
-    except Exception:
-        fecha_txt = ""
+def _a_grilla_latlon(field, lon_c, lat_c, domain, shape_dst=None, offset=0.0):
+    """
+    Remuestrea `field` (recorte en grilla fija, con vértices lon_c/lat_c)
+    a una grilla lon/lat uniforme sobre `domain` de tamaño shape_dst
+    (por defecto, el del recorte). Devuelve un array float32 con NaN fuera
+    del disco o del recorte.
 
+    `offset` se resta in-place sobre la grilla ya remuestreada (ej. 273.15
+    para pasar BT de K a °C) sin crear otra copia del campo completo.
+    """
+    lon_c = np.ma.filled(np.ma.asarray(lon_c, dtype=float), np.nan)
+    lat_c = np.ma.filled(np.ma.asarray(lat_c, dtype=float), np.nan)
+
+    # La grilla fija es regular en x/y: basta con los bordes del recorte
+    x_arr, _ = _geos_xy(lon_c[[0, -1], :], lat_c[[0, -1], :])
+    _, y_izq = _geos_xy(lon_c[:, 0], lat_c[:, 0])
+    _, y_der = _geos_xy(lon_c[:, -1], lat_c[:, -1])
+    with np.errstate(invalid="ignore"):
+        x_cols = np.nanmean(x_arr, axis=0)
+        y_filas = np.nanmean(np.stack([y_izq, y_der]), axis=0)
+
+    i, j, sin_dato = _indices_grilla_latlon(
+        tuple(domain),
+        field.shape,
+        field.shape if shape_dst is None else tuple(shape_dst),
+        round(float(x_cols[0]), 9),
+        round(float(x_cols[-1]), 9),
+        round(float(y_filas[0]), 9),
+        round(float(y_filas[-1]), 9),
+    )
 
-    
+    # Se indexa el campo original (sin copiarlo ni convertirlo entero) y
+    # solo la grilla resultante pasa a float32
+    out = np.asarray(np.ma.getdata(field))[i, j].astype(np.float32)
+    mascara = np.ma.getmask(field)
+    if mascara is not np.ma.nomask:
+        out[mascara[i, j]] = np.nan
+    if offset:
+        out -= np.float32(offset)
+    out[sin_dato] = np.nan
+    return out
 
-    # -------------------------------------------------
-    # PALETAS ESPECÍFICAS POR BANDA (usando ccp)
-    # -------------------------------------------------
-    cmap  = None
-    norm  = None
-    bounds = None
-    cbticks = None   # ticks de la barra de color
 
-    # field = lo que realmente vamos a plotear (reflectancia o BT en °C)
-    field = CMI.data.copy()
-    cb_units = units  # etiqueta del colorbar
+def _lut_boundary(cmap, norm, bounds):
+    """
+    Tabla de colores equivalente a (cmap, BoundaryNorm) para dibujar el
+    campo ya discretizado con np.digitize: un color por intervalo, más
+    "under" (índice 0), "over" (índice n) y sin dato (n + 1, transparente).
+
+    Devuelve (ListedColormap, NoNorm, bordes float32) o None si los
+    intervalos no caben en un uint8.
+    """
+    edges = np.asarray(bounds, dtype=np.float32)
+    n = edges.size
+    if n + 2 > 256:
+        return None
+
+    # Un valor representativo por intervalo, pasado una sola vez por la norma
+    reps = np.concatenate((
+        [edges[0] - 1.0],
+        (edges[:-1] + edges[1:]) / 2,
+        [edges[-1] + 1.0],
+    ))
+    colores = cmap(norm(reps))
+    lut = np.vstack((colores, [0.0, 0.0, 0.0, 0.0]))
+
+    return (
+        mcolors.ListedColormap(lut),
+        mcolors.NoNorm(vmin=0, vmax=lut.shape[0] - 1),
+        edges,
+    )
 
+
+def _discretizar(field, lut):
+    """
+    Campo float → índices uint8 en la tabla de `_lut_boundary`.
+    """
+    edges = lut[2]
+    indexed = np.digitize(field, edges).astype(np.uint8)
+    indexed[np.isnan(field)] = edges.size + 1
+    return indexed
+
+
+@lru_cache(maxsize=None)
+def _palette_band(banda_num):
+    """
+    Paleta de una banda ABI:
+    (cmap, norm, bounds, cbticks, cb_units, offset, lut).
+
+    Depende solo de la banda, así que se construye una vez y se reutiliza en
+    cada figura/frame. offset es lo que se resta al campo (273.15 en las
+    bandas IR, que se muestran en °C); cb_units=None = usar las unidades del
+    archivo. lut es la tabla de `_lut_boundary` para dibujar el campo
+    discretizado. Devuelve None para bandas sin paleta propia.
+    """
     if banda_num == 2:
         # Visible 0.64 µm — escala en grises (como en el notebook)
         paleta = [plt.cm.Greys_r, ccp.range(0.0, 1.0, 0.01)]
         cmap, ticks, norm, bounds = ccp.creates_palette([paleta], extend="both")
         cbticks = ccp.range(0.0, 1.0, 0.1)
+        return cmap, norm, bounds, cbticks, None, 0.0, _lut_boundary(cmap, norm, bounds)
 
-    elif banda_num == 8:
+    if banda_num == 8:
         # Canal 8 (6.2 µm) — la paleta que usaste en el trabajo
         # Vapor de agua: trabajamos en °C (BT - 273.15)
-        field = field - 273.15
-        cb_units = "°C"
-
         paleta_1 = [['black',
                     (174/255, 46/255, 172/255),
                     (239/255, 139/255, 238/255)],
@@ -397,13 +665,11 @@ def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None):
             extend="both"
         )
         cbticks = ccp.range(-90.0, 15.0, 15)
+        return cmap, norm, bounds, cbticks, "°C", 273.15, _lut_boundary(cmap, norm, bounds)
 
-    elif banda_num == 13:
+    if banda_num == 13:
         # Canal 13 (10.3 µm) — paleta IR de tu notebook
         # IR ventana: también en °C
-        field = field - 273.15
-        cb_units = "°C"
-
         paleta_1 = [['maroon', 'red', 'darkorange',
                     '#ffff00', 'forestgreen', 'cyan', 'royalblue',
                     (148/255, 0/255, 211/255)],
@@ -418,136 +684,337 @@ def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None):
             extend="both"
         )
         cbticks = ccp.range(-90.0, 60.0, 15)
+        return cmap, norm, bounds, cbticks, "°C", 273.15, _lut_boundary(cmap, norm, bounds)
+
+    return None
+
+
+def _leer_frame_goes(nc_path, domain, downsample=True):
+    """
+    Lee un archivo GOES y devuelve un dict con todo lo necesario para
+    dibujarlo: field (lo que se plotea, ya en grilla lon/lat regular sobre
+    el dominio y dibujable con cmap_img/norm_img), metadatos del título y
+    la paleta (cmap, norm, cbticks, cb_units) según la banda. Con
+    downsample=True la grilla se limita a la resolución de la figura (ver
+    `_shape_pantalla`).
+    """
+    import GOES
+
+    # ======================================================
+    #   CARGAR ARCHIVO GOES
+    # ======================================================
+    ds = GOES.open_dataset(nc_path)
+
+    # ======================================================
+    #   LEER IMAGEN (CMI) + COORDENADAS
+    #   (usamos lonlat="corner" para obtener Lon/Lat de vértices)
+    # ======================================================
+    # Si en algún momento necesitas detectar otra variable, aquí podrías
+    # hacer un loop por ["CMI", "CMIP", "Rad", "Sectorized_CMI"].
+
+    CMI, LonCor, LatCor = ds.image("CMI", lonlat="corner", domain=domain)
+
+    units     = CMI.units
 
+    # ======================================================
+    #   METADATOS PARA EL TÍTULO
+    # ======================================================
+    # Número de banda
+    try:
+        banda_num = int(ds.variable("band_id").data[0])
+    except Exception:
+        # Respaldo: intentar sacarlo del nombre del archivo
+        base = os.path.basename(nc_path)
+        m = re.search(r"C(\d{2})_", base)
+        banda_num = int(m.group(1)) if m else 0
+
+    # Longitud de onda (si está disponible)
+    try:
+        wave = float(ds.variable("band_wavelength").data[0])
+    except Exception:
+        wave = None
+
+    # Hora de inicio del barrido
+    try:
+        fecha_txt = ds.attribute("time_coverage_start")  # ej. "2025-12-01T00:00:20.8Z"
+    except Exception:
+        fecha_txt = ""
+
+    # -------------------------------------------------
+    # PALETA SEGÚN LA BANDA
+    # -------------------------------------------------
+    # field = lo que realmente vamos a plotear (reflectancia o BT en °C);
+    # sin copia: se recorta al dominio antes de cualquier cuenta, y el
+    # remuestreo crea un array nuevo y ahí se aplica offset
+    field, lon_c, lat_c = _recortar_a_dominio(
+        CMI.data, LonCor.data, LatCor.data, domain
+    )
+
+    paleta = _palette_band(banda_num)
+    if paleta is not None:
+        cmap, norm, bounds, cbticks, cb_units, offset, lut = paleta
+        if cb_units is None:
+            cb_units = units  # etiqueta del colorbar = unidades del archivo
     else:
-        # Fallback para otras bandas: turbo autoescalado
-        cmap = plt.cm.turbo
-        norm = None
-        bounds = None
-        cbticks = None
-        # Caso genérico
+        # Fallback para otras bandas: grises autoescalados (depende de los
+        # datos, así que no se puede precalcular)
+        cb_units = units
+        offset = 0.0
         vmin = float(np.nanmin(field))
         vmax = float(np.nanmax(field))
         paleta = [plt.cm.Greys, ccp.range(vmin, vmax, (vmax - vmin) / 20)]
         cmap, ticks, norm, bounds = ccp.creates_palette([paleta], extend="both")
         cbticks = ticks
+        lut = _lut_boundary(cmap, norm, bounds)
 
-    # ======================================================
-    #   FIGURA CON DOS EJES (imagen + minimapa)
-    # ======================================================
-    fig = plt.figure(figsize=(10, 12))
-
-    # ----- Eje principal (imagen satelital) -----
-    ax = fig.add_axes([0.05, 0.32, 0.90, 0.63],
-                           projection=ccrs.PlateCarree())
-    
-    #   EJES DE LATITUD / LONGITUD
-    gl = ax.gridlines(
-        draw_labels=True,
-        linewidth=0.6,
-        color="white",
-        alpha=0.7,
-        linestyle="--",
+    # Grilla lon/lat regular sobre el dominio, lista para imshow
+    field = _a_grilla_latlon(
+        field, lon_c, lat_c, domain,
+        shape_dst=_shape_pantalla(field.shape, downsample),
+        offset=offset,
     )
 
-    gl.top_labels = False
-    gl.right_labels = False
+    # Con tabla de colores, se dibujan índices uint8 (un acceso a memoria por
+    # píxel) en vez de pasar cada píxel por BoundaryNorm al dibujar
+    if lut is not None:
+        field = _discretizar(field, lut)
+        cmap_img, norm_img = lut[0], lut[1]
+    else:
+        cmap_img, norm_img = cmap, norm
+
+    return {
+        "field": field,
+        "banda_num": banda_num,
+        "wave": wave,
+        "fecha_txt": fecha_txt,
+        "cmap": cmap,
+        "norm": norm,
+        "cmap_img": cmap_img,
+        "norm_img": norm_img,
+        "cbticks": cbticks,
+        "cb_units": cb_units,
+    }
 
-    gl.xlabel_style = {"size": 10, "color": "white"}
-    gl.ylabel_style = {"size": 10, "color": "white"}
 
-    gl.xformatter = cticker.LongitudeFormatter(number_format='.1f')
-    gl.yformatter = cticker.LatitudeFormatter(number_format='.1f')
+def _plot_glm(ax, glm_path, domain):
+    """
+    Dibuja (o reemplaza) el overlay de flashes GLM en `ax`.
+    """
+    import xarray as xr
 
-    # Extensión al dominio elegido
-    ax.set_extent([lon_min, lon_max, lat_min, lat_max],
-                       crs=ccrs.PlateCarree())
+    pc = _plate_carree()
 
-    # Costas y fronteras
-    ax.add_feature(cfeature.COASTLINE.with_scale("50m"),
-                        edgecolor="yellow", linewidth=0.6)
-    ax.add_feature(cfeature.BORDERS.with_scale("50m"),
-                        edgecolor="yellow", linewidth=0.4)
-    ax.add_feature(cfeature.LAND.with_scale("50m"),
-                        facecolor="none", edgecolor="yellow", linewidth=0.2)
+    lon_min, lon_max, lat_min, lat_max = domain
 
+    # Quitamos el overlay del frame anterior (si lo hay)
+    for coll in list(ax.collections):
+        if coll.get_label() == "Flashes GLM":
+            coll.remove()
+    if ax.get_legend() is not None:
+        ax.get_legend().remove()
 
-    proj_sat = ccrs.PlateCarree()
-    im = ax.pcolormesh(
-        LonCor.data,
-        LatCor.data,
-        field,
-        cmap=cmap,
-        norm=norm,
-        transform=proj_sat
-    )
+    if glm_path is None or not os.path.exists(glm_path):
+        return
 
-    # ============================================
-    #  EJES DE LATITUD / LONGITUD
-    # ============================================
-    # Elegimos un espaciado razonable según el dominio
-    dx = max(1, int((lon_max - lon_min) / 6))  # aprox 6 divisiones en X
-    dy = max(1, int((lat_max - lat_min) / 6))  # aprox 6 divisiones en Y
-
-    xticks = np.arange(np.floor(lon_min), np.ceil(lon_max) + dx, dx)
-    yticks = np.arange(np.floor(lat_min), np.ceil(lat_max) + dy, dy)
-
-    # Ticks en proyección geográfica
-    ax.set_xticks(xticks, crs=ccrs.PlateCarree())
-    ax.set_yticks(yticks, crs=ccrs.PlateCarree())
-
-    # Formateadores de grados
-    lon_formatter = cticker.LongitudeFormatter(number_format=".0f", degree_symbol="°")
-    lat_formatter = cticker.LatitudeFormatter(number_format=".0f", degree_symbol="°")
-
-    ax.xaxis.set_major_formatter(lon_formatter)
-    ax.yaxis.set_major_formatter(lat_formatter)
-
-    # Estilo de las etiquetas
-    ax.tick_params(
-        axis="both",
-        which="major",
-        labelsize=8,
-        colors="white",
-        bottom=True,
-        left=True,
-        top=False,
-        right=False,
+    try:
+        # open_dataset es perezoso: solo se leen del disco las dos variables
+        # que usamos; el `with` cierra el archivo apenas las tenemos.
+        with xr.open_dataset(glm_path, decode_times=False) as ds_glm:
+            # Buscamos variables de lat/lon que existan en el archivo
+            lat_candidates = ["flash_lat", "event_lat", "group_lat", "latitude"]
+            lon_candidates = ["flash_lon", "event_lon", "group_lon", "longitude"]
+
+            lat_name = next(v for v in lat_candidates if v in ds_glm.variables)
+            lon_name = next(v for v in lon_candidates if v in ds_glm.variables)
+
+            lats = ds_glm[lat_name].values
+            lons = ds_glm[lon_name].values
+
+        # Filtrar por dominio (una sola máscara, comparaciones in-place)
+        mask = np.greater_equal(lons, lon_min)
+        mask &= lons <= lon_max
+        mask &= lats >= lat_min
+        mask &= lats <= lat_max
+        idx = np.flatnonzero(mask)
+
+        # Si hay MUCHOS flashes, submuestreo aleatorio (sin reemplazo) para
+        # conservar la densidad espacial; semilla fija = mismo dibujo siempre
+        max_points = 5000
+        if idx.size > max_points:
+            idx = np.random.default_rng(0).choice(idx, max_points, replace=False)
+
+        if idx.size > 0:
+            scat = ax.scatter(
+                lons[idx],
+                lats[idx],
+                s=8,
+                c="magenta",
+                marker=".",
+                alpha=0.7,
+                transform=pc,
+                zorder=6,
+                label="Flashes GLM",
+            )
+            # En salidas vectoriales (PDF/SVG) se embebe como raster
+            scat.set_rasterized(True)
+            # Pequeña leyenda
+            ax.legend(
+                loc="lower left",
+                fontsize=8,
+                framealpha=0.4,
+            )
+
+    except Exception as e:
+        # No rompemos el gráfico si falla GLM; solo lo avisamos en consola
+        print(f"[WARN] No se pudo graficar GLM: {e}")
+
+
+# Extensión del minimapa (lon_min, lon_max, lat_min, lat_max)
+MINIMAPA_EXTENT = (-130.0, -30.0, -60.0, 20.0)
+
+
+@lru_cache(maxsize=8)
+def _geometrias_recortadas(scale, domain):
+    """
+    Costas, fronteras y tierra de Natural Earth (escala `scale`) recortadas
+    al dominio, como dict {"coast", "borders", "land"} de geometrías shapely.
+
+    Leer y parsear los shapefiles es de lo más caro de cada figura; así se
+    hace una sola vez por (escala, dominio) y se reutiliza en cada frame.
+    """
+    import cartopy.feature as cfeature
+    from shapely.geometry import box
+
+    lon_min, lon_max, lat_min, lat_max = domain
+    # Un pequeño margen para que las líneas no se corten justo en el borde
+    margen = 1.0
+    extent = (lon_min - margen, lon_max + margen, lat_min - margen, lat_max + margen)
+    caja = box(extent[0], extent[2], extent[1], extent[3])
+
+    geoms = {}
+    for nombre, feature in (
+        ("coast", cfeature.COASTLINE),
+        ("borders", cfeature.BORDERS),
+        ("land", cfeature.LAND),
+    ):
+        recortes = (
+            g.intersection(caja)
+            for g in feature.with_scale(scale).intersecting_geometries(extent)
+        )
+        geoms[nombre] = [g for g in recortes if not g.is_empty]
+
+    return geoms
+
+
+@lru_cache(maxsize=1)
+def _fondo_minimapa(ancho_px=400):
+    """
+    Costas y fronteras 110m del minimapa (MINIMAPA_EXTENT) rasterizadas una
+    sola vez a un array RGBA con fondo transparente. Es idéntico en todas
+    las figuras, así que se dibuja con un imshow en vez de redibujar
+    las líneas de cartopy en cada frame.
+    """
+    pc = _plate_carree()
+    lon_min, lon_max, lat_min, lat_max = MINIMAPA_EXTENT
+    alto_px = int(round(ancho_px * (lat_max - lat_min) / (lon_max - lon_min)))
+
+    dpi = 100
+    fig = Figure(figsize=(ancho_px / dpi, alto_px / dpi), dpi=dpi)
+    fig.patch.set_alpha(0.0)
+    canvas = FigureCanvasAgg(fig)
+
+    # ejes a figura completa y sin borde: el array cubre justo la extensión
+    ax = fig.add_axes([0, 0, 1, 1], projection=pc)
+    ax.set_extent(MINIMAPA_EXTENT, crs=pc)
+    ax.patch.set_visible(False)
+    ax.spines["geo"].set_visible(False)
+
+    geoms = _geometrias_recortadas("110m", MINIMAPA_EXTENT)
+    ax.add_geometries(geoms["coast"], pc, facecolor="none", edgecolor="black")
+    ax.add_geometries(geoms["borders"], pc, facecolor="none", edgecolor="black")
+
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+
+def _titulo(fig, frame, region_name):
+    # fig.suptitle reutiliza el Text existente, así que sirve para actualizar.
+    # Devuelve ese Text.
+    if frame["wave"] is not None:
+        titulo_banda = f"G19 C{frame['banda_num']:02d} ({frame['wave']:.2f} µm)"
+    else:
+        titulo_banda = f"G19 C{frame['banda_num']:02d}"
+
+    return fig.suptitle(
+        f"{titulo_banda}   {frame['fecha_txt']}   –   {region_name}",
+        fontsize=20,
+        fontweight="bold",
+        y=0.97
     )
 
+
+def build_base_figure(nc_path, domain=None, region_name="", downsample=True):
+    """
+    Construye la figura completa (ejes, costas, gridlines, colorbar,
+    minimapa y título) a partir de un primer archivo GOES.
+
+    Devuelve (fig, ax, im). Para los frames siguientes del mismo dominio
+    y banda basta con `update_figure`, sin reconstruir nada más
+    (usando el mismo `downsample`).
+    """
+    from cartopy.mpl.ticker import LatitudeFormatter, LongitudeFormatter
+
+    pc = _plate_carree()
+
+    domain = _resolver_dominio(domain, region_name)
+    lon_min, lon_max, lat_min, lat_max = domain
+
+    frame = _leer_frame_goes(nc_path, domain, downsample=downsample)
+    field = frame["field"]
+    cmap, norm = frame["cmap"], frame["norm"]
+
     # ======================================================
     #   FIGURA (imagen + minimapa)
     # ======================================================
-    fig = plt.figure(figsize=(10, 12))
+    # Figura propia con canvas Agg, fuera del registro de pyplot: Streamlit
+    # hace plt.close("all") al terminar cada rerun (de cualquier sesión) y
+    # eso le cambiaría el canvas a una figura aún en uso (ej. animación)
+    fig = Figure(figsize=FIGSIZE)
+    FigureCanvasAgg(fig)
 
     # ----- Eje principal (imagen satelital) -----
     ax = fig.add_axes(
-        [0.12, 0.25, 0.78, 0.70],  # posición afinada
-        projection=ccrs.PlateCarree()
+        list(EJE_PRINCIPAL),  # posición afinada
+        projection=pc
     )
 
     # Extensión al dominio elegido
     ax.set_extent([lon_min, lon_max, lat_min, lat_max],
-                crs=ccrs.PlateCarree())
+                crs=pc)
 
     # Costas y bordes
-    ax.add_feature(cfeature.COASTLINE.with_scale("50m"),
-                edgecolor="yellow", linewidth=0.6)
-    ax.add_feature(cfeature.BORDERS.with_scale("50m"),
-                edgecolor="yellow", linewidth=0.4)
-    ax.add_feature(cfeature.LAND.with_scale("50m"),
-                facecolor="none", edgecolor="yellow", linewidth=0.2)
-
-    # Imagen satelital
-    im = ax.pcolormesh(
-        LonCor.data,
-        LatCor.data,
+    geoms = _geometrias_recortadas("50m", tuple(domain))
+    ax.add_geometries(geoms["coast"], pc,
+                      facecolor="none", edgecolor="yellow", linewidth=0.6)
+    ax.add_geometries(geoms["borders"], pc,
+                      facecolor="none", edgecolor="yellow", linewidth=0.4)
+    ax.add_geometries(geoms["land"], pc,
+                      facecolor="none", edgecolor="yellow", linewidth=0.2)
+
+    # Imagen satelital: un solo raster (en vez de un polígono por píxel)
+    im = ax.imshow(
         field,
-        cmap=cmap,
-        norm=norm,
-        transform=ccrs.PlateCarree(),
+        cmap=frame["cmap_img"],
+        norm=frame["norm_img"],
+        extent=[lon_min, lon_max, lat_min, lat_max],
+        origin="upper",
+        interpolation="nearest",
+        transform=pc,
     )
 
+    # En salidas vectoriales (PDF/SVG) se embebe como raster
+    im.set_rasterized(True)
+
     # ======================================================
     #   GRIDLINES CON ETIQUETAS EXTERNAS (perfectamente alineadas)
     # ======================================================
@@ -557,7 +1024,7 @@ def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None):
         color="white",
         alpha=0.7,
         linestyle="--",
-        crs=ccrs.PlateCarree(),
+        crs=pc,
     )
 
     # Apagar etiquetas arriba y derecha
@@ -568,10 +1035,9 @@ def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None):
     gl.xlabel_style = {"size": 9, "color": "black"}
     gl.ylabel_style = {"size": 9, "color": "black"}
 
-    # Control fino de los ticks
-    import matplotlib.ticker as mticker
-    from cartopy.mpl.ticker import LongitudeFormatter, LatitudeFormatter
-
+    # Control fino de los ticks: paso entero en grados (~6 líneas por eje).
+    # El locator del gridliner genera las posiciones; no hace falta armar
+    # arrays de ticks ni set_xticks/set_yticks aparte
     dx = max(1, int((lon_max - lon_min) / 6))
     dy = max(1, int((lat_max - lat_min) / 6))
 
@@ -581,62 +1047,6 @@ def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None):
     gl.xformatter = LongitudeFormatter(number_format=".0f", degree_symbol="°")
     gl.yformatter = LatitudeFormatter(number_format=".0f", degree_symbol="°")
 
-    # ======================================================
-    #  OVERLAY DE ACTIVIDAD ELÉCTRICA (GLM)
-    # ======================================================
-    if glm_path is not None and os.path.exists(glm_path):
-        try:
-            ds_glm = xr.open_dataset(glm_path)
-
-            # Buscamos variables de lat/lon que existan en el archivo
-            lat_candidates = ["flash_lat", "event_lat", "group_lat", "latitude"]
-            lon_candidates = ["flash_lon", "event_lon", "group_lon", "longitude"]
-
-            lat_name = next(v for v in lat_candidates if v in ds_glm.variables)
-            lon_name = next(v for v in lon_candidates if v in ds_glm.variables)
-
-            lats = ds_glm[lat_name].values
-            lons = ds_glm[lon_name].values
-
-            # Filtrar por dominio
-            mask = (
-                (lons >= lon_min) & (lons <= lon_max) &
-                (lats >= lat_min) & (lats <= lat_max)
-            )
-            lats = lats[mask]
-            lons = lons[mask]
-
-            # Si hay MUCHOS flashes, submuestrear un poco
-            max_points = 5000
-            if lats.size > max_points:
-                idx = np.linspace(0, lats.size - 1, max_points, dtype=int)
-                lats = lats[idx]
-                lons = lons[idx]
-
-            if lats.size > 0:
-                ax.scatter(
-                    lons,
-                    lats,
-                    s=8,
-                    c="magenta",
-                    marker=".",
-                    alpha=0.7,
-                    transform=ccrs.PlateCarree(),
-                    zorder=6,
-                    label="Flashes GLM",
-                )
-                # Pequeña leyenda
-                ax.legend(
-                    loc="lower left",
-                    fontsize=8,
-                    framealpha=0.4,
-                )
-
-        except Exception as e:
-            # No rompemos el gráfico si falla GLM; solo lo avisamos en consola
-            print(f"[WARN] No se pudo graficar GLM: {e}")
-
-
     # ======================================================
     #  BARRA DE COLORES (bien separada)
     # ======================================================
@@ -644,7 +1054,11 @@ def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None):
     # 👉 IMPORTANTE: elimina cualquier otro cax/colorbar que tuvieras antes
     # y usa solo este:
     cax = fig.add_axes([0.10, 0.12, 0.80, 0.03])  # más abajo que los ejes de lon/lat
-    cb = plt.colorbar(im, cax=cax, orientation="horizontal", extend="both")
+    # La barra usa la paleta real (la imagen puede estar en índices de la LUT)
+    cb = fig.colorbar(
+        mpl.cm.ScalarMappable(norm=norm, cmap=cmap),
+        cax=cax, orientation="horizontal", extend="both",
+    )
     cb.ax.tick_params(labelsize=8)
 
     # (opcional) título de la barra
@@ -656,21 +1070,22 @@ def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None):
     # ======================================================
     #ax_map = fig.add_axes([0.05, 0.05, 0.5, 0.15],
     ax_map = fig.add_axes([0.8, 0.76, 0.18, 0.18],  # (x, y, width, height) dentro de la figura
-                          projection=ccrs.PlateCarree())
+                          projection=pc)
 
-    ax_map.set_extent([-130, -30, -60, 20])  # vista amplia de Sudamérica
-    ax_map.add_feature(cfeature.COASTLINE.with_scale("110m"))
-    ax_map.add_feature(cfeature.BORDERS.with_scale("110m"))
+    # Fondo estático (costas + fronteras) precalculado como imagen
+    ax_map.imshow(_fondo_minimapa(), extent=MINIMAPA_EXTENT, origin="upper",
+                  transform=pc)
+    ax_map.set_extent(MINIMAPA_EXTENT)  # vista amplia de Sudamérica
 
     # Rectángulo del dominio seleccionado
-    rect = plt.Rectangle(
+    rect = Rectangle(
         (lon_min, lat_min),
         lon_max - lon_min,
         lat_max - lat_min,
         fill=False,
         color="red",
         linewidth=1,
-        transform=ccrs.PlateCarree()
+        transform=pc
     )
     ax_map.add_patch(rect)
 
@@ -679,17 +1094,167 @@ def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None):
     # ======================================================
     #   TÍTULO GENERAL
     # ======================================================
-    if wave is not None:
-        titulo_banda = f"G19 C{banda_num:02d} ({wave:.2f} µm)"
-    else:
-        titulo_banda = f"G19 C{banda_num:02d}"
+    _titulo(fig, frame, region_name)
 
-    fig.suptitle(
-        f"{titulo_banda}   {fecha_txt}   –   {region_name}",
-        fontsize=20,
-        fontweight="bold",
-        y=0.97
+    return fig, ax, im
+
+
+def update_figure(fig, ax, im, nc_path, domain=None, region_name="", glm_path=None, downsample=True):
+    """
+    Actualiza una figura creada con `build_base_figure` con otro archivo
+    GOES del mismo dominio y banda: solo cambian los datos de la imagen,
+    el overlay GLM y el título. Costas, gridlines, colorbar y minimapa
+    se reutilizan.
+    """
+    _actualizar_artistas(fig, ax, im, nc_path, domain, region_name, glm_path, downsample)
+
+    fig.canvas.draw_idle()
+    return fig
+
+
+def _actualizar_artistas(fig, ax, im, nc_path, domain, region_name, glm_path, downsample=True):
+    # Lo que cambia entre frames (imagen, GLM, título), sin redibujar.
+    # Devuelve el Text del título.
+    domain = _resolver_dominio(domain, region_name)
+
+    frame = _leer_frame_goes(nc_path, domain, downsample=downsample)
+    im.set_data(frame["field"])
+
+    _plot_glm(ax, glm_path, domain)
+    return _titulo(fig, frame, region_name)
+
+
+class _FFMpegWriterRGBA(FFMpegWriter):
+    """
+    FFMpegWriter que además acepta frames ya compuestos: `grab_frame` pasa
+    por savefig y vuelve a dibujar toda la figura, lo que anula el blitting.
+
+    Depende de un detalle interno de matplotlib (`MovieWriter._proc`, el
+    proceso de ffmpeg); si desaparece, `puede_escribir_rgba` da False y
+    `animacion_goes_mp4` usa grab_frame.
+    """
+
+    def puede_escribir_rgba(self):
+        # ffmpeg lanzado (MovieWriter._proc, interno) y esperando frames RGBA
+        # crudos del tamaño de la figura
+        proc = getattr(self, "_proc", None)
+        return (
+            self.frame_format == "rgba"
+            and proc is not None
+            and getattr(proc, "stdin", None) is not None
+        )
+
+    def escribir_rgba(self, canvas):
+        """
+        Envía a ffmpeg el buffer RGBA actual de `canvas` (Agg) tal cual,
+        sin redibujar, por la entrada estándar de `_proc`. El canvas debe
+        medir lo mismo que `frame_size`.
+        """
+        buf = canvas.buffer_rgba()
+        w, h = self.frame_size
+        if buf.shape[:2] != (h, w):
+            raise ValueError(
+                f"El canvas mide {buf.shape[1]}x{buf.shape[0]} y el video {w}x{h}"
+            )
+        self._proc.stdin.write(buf)
+
+
+def animacion_goes_mp4(frames, domain=None, region_name="", fps=2, glm_paths=None) -> bytes:
+    """
+    Codifica una animación MP4 (vía ffmpeg) a partir de frames
+    [(dt, ruta_local_nc), ...] ya descargados.
+
+    La figura base se construye una sola vez con el primer frame. Con un
+    canvas que soporta blitting (Agg), colorbar y minimapa se rasterizan
+    una vez como fondo y en cada frame solo se redibujan el eje principal,
+    los ejes que lo solapan (minimapa) y el título sobre ese fondo; si no,
+    se usa `update_figure` + grab_frame.
+    glm_paths (opcional) es una lista alineada con frames (o None por frame).
+
+    Devuelve los bytes del MP4.
+    """
+    import tempfile
+
+    domain = _resolver_dominio(domain, region_name)
+    if glm_paths is None:
+        glm_paths = [None] * len(frames)
+
+    fig, ax, im = build_base_figure(frames[0][1], domain=domain, region_name=region_name)
+    writer = _FFMpegWriterRGBA(fps=fps)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ruta_mp4 = Path(tmpdir) / "anim.mp4"
+        # dpi de la figura: así cada frame es justo el buffer del canvas
+        with writer.saving(fig, str(ruta_mp4), dpi=fig.dpi):
+            blit = fig.canvas.supports_blit and writer.puede_escribir_rgba()
+            fondo = None
+            dinamicos = []
+
+            # El eje principal se dibuja encima de lo que solapa (el
+            # minimapa): esos ejes también se redibujan, en su orden
+            encima = [
+                a for a in fig.axes[fig.axes.index(ax) + 1:]
+                if a.get_position().overlaps(ax.get_position())
+            ]
+
+            for (dt, nc_path), glm_path in zip(frames, glm_paths):
+                if blit and not (
+                    fig.canvas.supports_blit and writer.puede_escribir_rgba()
+                ):
+                    # Se perdió el canvas Agg o el pipe: lo que queda se
+                    # graba dibujando la figura completa
+                    blit = False
+                    for artista in dinamicos:
+                        artista.set_animated(False)
+
+                if not blit:
+                    update_figure(
+                        fig,
+                        ax,
+                        im,
+                        nc_path,
+                        domain=domain,
+                        region_name=region_name,
+                        glm_path=glm_path,
+                    )
+                    writer.grab_frame()
+                    continue
+
+                titulo = _actualizar_artistas(
+                    fig, ax, im, nc_path, domain, region_name, glm_path
+                )
+                dinamicos = [ax, *encima, titulo]
+
+                if fondo is None:
+                    # Fondo estático: todo menos los artistas dinámicos
+                    for artista in dinamicos:
+                        artista.set_animated(True)
+                    fig.canvas.draw()
+                    fondo = fig.canvas.copy_from_bbox(fig.bbox)
+
+                fig.canvas.restore_region(fondo)
+                for artista in dinamicos:
+                    fig.draw_artist(artista)
+                writer.escribir_rgba(fig.canvas)
+
+        return ruta_mp4.read_bytes()
+
+
+def plot_goes_band_chile(nc_path, domain=None, region_name="", glm_path=None, downsample=True):
+    """
+    Genera un gráfico del GOES-19 con:
+    - Imagen satelital (CMI)
+    - Zoom dinámico por dominios
+    - Mapa pequeño con rectángulo del dominio (Opción A)
+
+    downsample=True limita la imagen a la resolución de la figura.
+    """
+    domain = _resolver_dominio(domain, region_name)
+
+    fig, ax, im = build_base_figure(
+        nc_path, domain=domain, region_name=region_name, downsample=downsample
     )
+    _plot_glm(ax, glm_path, domain)
 
     return fig
 
@@ -718,24 +1283,27 @@ def descargar_goes_serie_aws(
 
     Solo incluye horas para las que se encontró archivo GOES.
     """
-    horas = range(hora_central - (n_horas - 1), hora_central + 1)
+    # fuera de rango (0–23) lo saltamos
+    horas = [
+        h for h in range(hora_central - (n_horas - 1), hora_central + 1)
+        if 0 <= h <= 23
+    ]
 
     frames = []
-    for h in horas:
-        if h < 0 or h > 23:
-            # fuera de rango, lo saltamos
-            continue
-
-        nc_path = descargar_goes_aws(
-            year,
-            day_of_year,
-            h,
-            band,
-            carpeta=carpeta,
-        )
-        if nc_path is not None:
-            frames.append((h, nc_path))
-
-    # Ordenados por hora (por si acaso)
+    if not horas:
+        return frames
+
+    # Cada hora es una descarga independiente: las lanzamos en paralelo
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS_S3, len(horas))) as ex:
+        futuros = {
+            ex.submit(descargar_goes_aws, year, day_of_year, h, band, carpeta=carpeta): h
+            for h in horas
+        }
+        for futuro in as_completed(futuros):
+            nc_path = futuro.result()
+            if nc_path is not None:
+                frames.append((futuros[futuro], nc_path))
+
+    # Ordenados por hora (as_completed entrega en orden de llegada)
     frames.sort(key=lambda x: x[0])
     return frames
\ No newline at end of file